@@ -11,6 +11,10 @@
 #                       Controls which validation rules apply and which
 #                       manifests are required. Set to "votes" when called
 #                       from the collect-votes action.
+#   MANIFEST_SORT     — "1" (default) sorts the merged local+GCS manifest
+#                       lists for reproducible output; "0" skips the sort
+#                       when the consumer orders entries itself. The local
+#                       scan alone is always emitted in sorted order.
 #
 # NOTE (manifest vs. fetch decoupling):
 #   The manifest must reflect the FULL set of objects already in the GCS
@@ -23,6 +27,7 @@
 
 import json
 import os
+import re
 import subprocess
 import sys
 from pathlib import Path
@@ -33,37 +38,169 @@ latest = Path("latest_billtext")
 bucket = os.environ.get("GCS_BUCKET", "").rstrip("/")
 prefix = os.environ.get("GCS_PREFIX", "").strip("/")
 mode = os.environ.get("MANIFEST_MODE", "bills").strip().lower()
+sort_manifests = os.environ.get("MANIFEST_SORT", "1").strip() == "1"
+
+# Remote objects that are not bill data.json; one scan per path instead of
+# a separate substring test for each segment.
+NON_BILL_RE = re.compile(r"/(?:votes|text-versions)/")
 
 # Minimum expected counts — fail loudly if processing produced fewer.
 MIN_BILLS_EXPECTED = 50
 MIN_VOTES_EXPECTED = 50
 
-print(f"DEBUG: MANIFEST_MODE={mode!r}")
+print(f"DEBUG: MANIFEST_MODE={mode!r}  MANIFEST_SORT={int(sort_manifests)}")
 print(f"DEBUG: GCS_BUCKET={bucket!r}  GCS_PREFIX={prefix!r}")
 
 
-def atomic_write(path: Path, obj):
-    """Write JSON atomically to avoid partial files on failure."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = None
+# One compact encoder reused for every manifest entry. Manifests hold 100k+
+# paths and are only machine-read (n8n, jq), so no indent.
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_manifest(fh, files):
+    """Stream {"files": [...]} to fh one entry at a time."""
+    fh.write('{"files":[')
+    first = True
+    for f in files:
+        if not first:
+            fh.write(",")
+        first = False
+        fh.write(_ENCODER.encode(f))
+    fh.write("]}")
+
+
+def atomic_write_all(outputs: dict):
+    """
+    Write each {path: files} manifest atomically to avoid partial files on failure.
+
+    Every temp file is written before any is renamed into place, so a failure
+    part-way leaves all previous manifests untouched rather than a manifest
+    without its -gcs counterpart. No fsync: the files are uploaded by the
+    same CI job, so only atomic replacement matters, not durability.
+    """
+    tmps = []
     try:
-        with NamedTemporaryFile("w", delete=False, dir=str(path.parent), encoding="utf-8") as tf:
-            json.dump(obj, tf, ensure_ascii=False, indent=2)
-            tf.flush()
-            tmp = tf.name
-        os.replace(tmp, str(path))
+        for path, files in outputs.items():
+            # Manifests are written to the CWD; skip the mkdir stat for that case.
+            if path.parent != Path("."):
+                path.parent.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile("w", delete=False, dir=str(path.parent), encoding="utf-8") as tf:
+                tmps.append(tf.name)
+                _write_manifest(tf, files)
+        for tmp, path in zip(tmps, outputs):
+            os.replace(tmp, str(path))
     except Exception:
-        if tmp and os.path.exists(tmp):
-            try:
-                os.remove(tmp)
-            except Exception:
-                pass
+        for tmp in tmps:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
         raise
 
 
-def path_to_gcs_url(filepath: str) -> str:
+def _sort_key(entry) -> str:
+    # Sorting directories by "name/" makes a depth-first walk emit paths in
+    # plain string order, so callers never need to sort the full result.
+    return entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name
+
+
+def _walk(root: str):
+    """
+    Yield every regular data.json file under root as a '/'-separated path,
+    in sorted order. Raises FileNotFoundError (or NotADirectoryError) if root
+    itself is missing (or not a directory).
+
+    Hand-rolled os.scandir walk instead of Path.rglob: DirEntry.is_dir() and
+    is_file() answer from the cached dirent, so no per-entry stat() and no
+    Path object per candidate.
+    """
+    with os.scandir(root) as it:
+        entries = sorted(it, key=_sort_key)
+    for e in entries:
+        if e.is_dir(follow_symlinks=False):
+            yield from _walk(e.path)
+        elif e.name == "data.json" and e.is_file(follow_symlinks=False):
+            yield e.path.replace("\\", "/")
+
+
+def _subdirs(root: str) -> list:
+    """List the immediate subdirectories of root, sorted ([] if root is missing)."""
+    try:
+        with os.scandir(root) as it:
+            dirs = [e for e in it if e.is_dir(follow_symlinks=False)]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    dirs.sort(key=_sort_key)
+    return [e.path for e in dirs]
+
+
+def _glob_fixed(root: str, segments):
+    """
+    Yield files matching a fixed-depth pattern such as
+    ["*", "votes", "*", "*", "data.json"] under root.
+
+    Literal segments are joined straight onto the path without listing the
+    directory; only "*" segments cost an os.scandir. Unlike rglob this never
+    descends below the pattern's depth (e.g. into unzipped text-version
+    packages), so the walk is proportional to the number of matches.
+    """
+    head, rest = segments[0], segments[1:]
+    if not rest:
+        p = os.path.join(root, head)
+        if os.path.isfile(p):
+            yield p.replace("\\", "/")
+        return
+    if head != "*":
+        yield from _glob_fixed(os.path.join(root, head), rest)
+        return
+    for d in _subdirs(root):
+        yield from _glob_fixed(d, rest)
+
+
+def scan_data(root: str):
+    """
+    Classify data.json files under root in a single pass.
+
+    Returns (votes, bills, text_candidates), each a sorted tuple. Every
+    congress, bill-type and bill directory is listed exactly once; the bill's
+    own data.json and its text-versions/*/data.json are both picked up while
+    visiting that bill, rather than re-listing the bills/ tree per class.
+
+    Bill paths have the 'bills/' segment stripped to match GCS:
+      Local:  data/119/bills/s/s100/data.json
+      GCS:    data/119/s/s100/data.json  (rsync strips bills/)
+    Manifest must use GCS-equivalent path so n8n file_path
+    entries match what's actually in the bucket.
+    """
+    votes = []
+    bills = []
+    text_candidates = []
+    for congress in _subdirs(root):
+        votes.extend(_glob_fixed(congress, ["votes", "*", "*", "data.json"]))
+        for bill_type in _subdirs(os.path.join(congress, "bills")):
+            for bill in _subdirs(bill_type):
+                p = os.path.join(bill, "data.json")
+                if os.path.isfile(p):
+                    bills.append(p.replace("\\", "/").replace("/bills/", "/", 1))
+                text_candidates.extend(_glob_fixed(bill, ["text-versions", "*", "data.json"]))
+    # already in sorted order: _subdirs() lists each level sorted
+    return tuple(votes), tuple(bills), tuple(text_candidates)
+
+
+# Public URL root for manifest paths; computed once rather than per file.
+if not bucket:
+    GCS_DATA_URL = None
+elif prefix:
+    GCS_DATA_URL = f"https://storage.googleapis.com/{bucket}/{prefix}/data/"
+else:
+    GCS_DATA_URL = f"https://storage.googleapis.com/{bucket}/data/"
+
+
+def gcs_urls_for(files, root: str) -> list:
     """
-    Convert a manifest file path to its public GCS URL.
+    Map manifest paths under root (e.g. 'data' or 'latest_billtext') to
+    their public GCS URLs ('' for each when no bucket is set).
 
     Bills — manifest path (bills/ already stripped during classification):
       data/119/s/s123/data.json
@@ -78,27 +215,15 @@ def path_to_gcs_url(filepath: str) -> str:
 
     Votes — GCS URL:
       https://storage.googleapis.com/.../congress-vote-data/data/119/votes/2025/h1/data.json
-    """
-    if not bucket:
-        return ""
-
-    rel = filepath.replace("\\", "/")
-
-    # Strip leading 'data/' or 'latest_billtext/'
-    if rel.startswith("data/"):
-        rel = rel[len("data/"):]
-    elif rel.startswith("latest_billtext/"):
-        rel = rel[len("latest_billtext/"):]
 
-    # No bills/ stripping needed — already stripped during classification.
-    # Votes path maps directly to GCS as-is.
-
-    rel = rel.lstrip("/")
-
-    if prefix:
-        return f"https://storage.googleapis.com/{bucket}/{prefix}/data/{rel}"
-    else:
-        return f"https://storage.googleapis.com/{bucket}/data/{rel}"
+    No bills/ stripping needed — already stripped during classification.
+    Votes path maps directly to GCS as-is. Every path in a manifest shares
+    the same root, so the root is stripped by a fixed-length slice.
+    """
+    if GCS_DATA_URL is None:
+        return [""] * len(files)
+    n = len(root) + 1
+    return [GCS_DATA_URL + f[n:] for f in files]
 
 
 def list_gcs_data_paths() -> list:
@@ -160,42 +285,21 @@ def list_gcs_data_paths() -> list:
 # -----------------------------------------------------------------------
 # Scan
 # -----------------------------------------------------------------------
-print(f"DEBUG: base={base} (exists={base.exists()}); latest={latest} (exists={latest.exists()})")
+# latest is only probed once, by the billtext walk below
+base_exists = base.exists()
+print(f"DEBUG: base={base} (exists={base_exists}); latest={latest}")
 
-if not base.exists():
+if not base_exists:
     print("ERROR: data/ directory does not exist — nothing to scan.", flush=True)
     sys.exit(2)
 
-all_data = sorted(str(p).replace("\\", "/") for p in base.rglob("**/data.json") if p.is_file())
-print(f"DEBUG: total data.json found under data/: {len(all_data)}")
-if all_data:
+votes, bills, text_candidates = scan_data(str(base))
+print(f"DEBUG: total data.json found under data/: {len(votes) + len(bills) + len(text_candidates)}")
+sample = (votes + bills + text_candidates)[:8]
+if sample:
     print("DEBUG: sample data.json (up to 8):")
-    for s in all_data[:8]:
+    for s in sample:
         print("  ", s)
-
-# -----------------------------------------------------------------------
-# Classify
-# -----------------------------------------------------------------------
-votes = []
-bills = []
-text_candidates = []
-
-for p in all_data:
-    if "/votes/" in p:
-        votes.append(p)
-    elif "/bills/" in p:
-        if "/text-versions/" in p:
-            text_candidates.append(p)
-        else:
-            # Strip 'bills/' segment to match GCS path structure.
-            # Local:  data/119/bills/s/s100/data.json
-            # GCS:    data/119/s/s100/data.json  (rsync strips bills/)
-            # Manifest must use GCS-equivalent path so n8n file_path
-            # entries match what's actually in the bucket.
-            bills.append(p.replace("/bills/", "/", 1))
-    else:
-        print(f"DEBUG: ignoring unexpected data.json location: {p}")
-
 print(f"DEBUG: classified — votes={len(votes)}, bills={len(bills)}, text-version candidates={len(text_candidates)}")
 
 # -----------------------------------------------------------------------
@@ -214,15 +318,16 @@ print(f"DEBUG: classified — votes={len(votes)}, bills={len(bills)}, text-versi
 if mode == "votes":
     remote = [p for p in list_gcs_data_paths() if "/votes/" in p]
     _local = len(votes)
-    votes = sorted(set(votes) | set(remote))
+    if remote:
+        merged = set(votes) | set(remote)
+        votes = sorted(merged) if sort_manifests else list(merged)
     print(f"DEBUG: votes union — local={_local}, remote(GCS)={len(remote)}, union={len(votes)}")
 else:
-    remote = [
-        p for p in list_gcs_data_paths()
-        if "/votes/" not in p and "/text-versions/" not in p
-    ]
+    remote = [p for p in list_gcs_data_paths() if not NON_BILL_RE.search(p)]
     _local = len(bills)
-    bills = sorted(set(bills) | set(remote))
+    if remote:
+        merged = set(bills) | set(remote)
+        bills = sorted(merged) if sort_manifests else list(merged)
     print(f"DEBUG: bills union — local={_local}, remote(GCS)={len(remote)}, union={len(bills)}")
 
 # -----------------------------------------------------------------------
@@ -261,41 +366,41 @@ else:
 # -----------------------------------------------------------------------
 billtext = []
 billtext_src = "n/a (votes mode)"
+billtext_root = str(base)
 
 if mode != "votes":
-    if latest.exists():
-        latest_files = sorted(str(p).replace("\\", "/") for p in latest.rglob("**/data.json") if p.is_file())
+    try:
+        latest_files = list(_walk(str(latest)))
+    except (FileNotFoundError, NotADirectoryError):
+        latest_files = None
+    if latest_files is None:
+        billtext = list(text_candidates)
+        billtext_src = "data text-versions"
+    else:
         print(f"DEBUG: latest_billtext exists with {len(latest_files)} data.json files")
         if latest_files:
             billtext = latest_files
             billtext_src = "latest_billtext"
+            billtext_root = str(latest)
         else:
-            billtext = sorted(text_candidates)
+            billtext = list(text_candidates)
             billtext_src = "data text-versions (fallback — latest_billtext was empty)"
-    else:
-        billtext = sorted(text_candidates)
-        billtext_src = "data text-versions"
 
 print(f"SUMMARY: votes={len(votes)}, bills={len(bills)}, billtext={len(billtext)} (source={billtext_src})")
 
 # -----------------------------------------------------------------------
 # Write manifests
 # -----------------------------------------------------------------------
+# name -> (files, local root those paths start with)
 manifests = {
-    "votes-manifest.json": votes,
-    "bills-manifest.json": bills,
-    "billtext-manifest.json": billtext,
+    "votes-manifest.json": (votes, str(base)),
+    "bills-manifest.json": (bills, str(base)),
+    "billtext-manifest.json": (billtext, billtext_root),
 }
 
-for name, files in manifests.items():
-    try:
-        atomic_write(Path(name), {"files": files})
-        print(f"WROTE: {name} ({len(files)} entries)")
-    except Exception as e:
-        print(f"ERROR: writing {name}: {e}", flush=True)
-        sys.exit(3)
-
-    gcs_urls = [path_to_gcs_url(f) for f in files]
+outputs = {}
+for name, (files, root) in manifests.items():
+    gcs_urls = gcs_urls_for(files, root)
 
     # Spot-check bills GCS URLs for sanity
     if gcs_urls and name == "bills-manifest.json":
@@ -314,12 +419,17 @@ for name, files in manifests.items():
         for u in gcs_urls[:3]:
             print("  ", u)
 
-    gcs_name = name.replace(".json", "-gcs.json")
-    try:
-        atomic_write(Path(gcs_name), {"files": gcs_urls})
-        print(f"WROTE: {gcs_name} ({len(gcs_urls)} URLs)")
-    except Exception as e:
-        print(f"ERROR: writing {gcs_name}: {e}", flush=True)
-        sys.exit(3)
+    outputs[Path(name)] = files
+    outputs[Path(name.replace(".json", "-gcs.json"))] = gcs_urls
+
+try:
+    atomic_write_all(outputs)
+except Exception as e:
+    print(f"ERROR: writing manifests: {e}", flush=True)
+    sys.exit(3)
+
+for path, files in outputs.items():
+    kind = "URLs" if path.name.endswith("-gcs.json") else "entries"
+    print(f"WROTE: {path} ({len(files)} {kind})")
 
 print("DONE: all manifests written successfully.")
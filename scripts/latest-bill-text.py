@@ -1,14 +1,43 @@
+import calendar
+import errno
+import functools
 import json
+import operator
+import os
 import pathlib
 import shutil
+import stat
 import sys
 import tempfile
 import xml.etree.ElementTree as ET
+import zipfile
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 
-base = pathlib.Path("data")
-out = pathlib.Path("latest_billtext")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Candidate reads and copies are small-file I/O, so threads overlap well.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# issued_on is written near the top of every text-version data.json, so a
+# regex over the first few KB usually finds it without a full json.load.
+ISSUED_ON_RE = re.compile(rb'"issued_on"\s*:\s*"([^"\\]+)"')
+HEAD_BYTES = 4096
+ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+# MODS / path patterns, compiled once rather than looked up per element
+YEAR_RE = re.compile(r"\d{4}")
+DATE_OR_YEAR_RE = re.compile(r"(\d{4}-\d{2}-\d{2}|\d{4})")
+HUMAN_ID_RE = re.compile(
+    r'(?i)^(?:hr|s|hres|sres|hjres|sjres|hconres|sconres)[0-9]+-[0-9]{1,4}-[a-z]{1,10}$'
+)
+HTTP_RE = re.compile(r"https?://")
+BILL_DIR_RE = re.compile(r'^([a-z]+)(\d+)')
+DIGITS_RE = re.compile(r'(\d+)')
 
 
 def parse_date(s):
@@ -25,88 +54,195 @@ def parse_date(s):
             return None
 
 
-def mtime_dt(p):
+def load_json(raw: bytes):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def dump_json(obj) -> bytes:
+    # same layout either way: 2-space indent, non-ASCII left unescaped
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def to_timestamp(dt):
+    # date-only issued_on parses naive; treat it as UTC like file mtimes
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def issued_timestamp(s):
+    """
+    UTC timestamp for an issued date string, or None if it can't be parsed.
+    Plain YYYY-MM-DD (nearly every issued_on) is converted arithmetically;
+    only other forms go through datetime.
+    """
+    if not s or not isinstance(s, str):
+        return None
+    return _issued_timestamp(s)
+
+
+# Versions of a bill, and bills from the same day, share issued strings.
+@functools.lru_cache(maxsize=4096)
+def _issued_timestamp(s: str):
+    m = ISO_DATE_RE.fullmatch(s)
+    if m:
+        y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        # anything datetime would refuse (2023-02-30, year 0) goes to parse_date
+        if y >= 1 and 1 <= mo <= 12 and 1 <= d <= calendar.monthrange(y, mo)[1]:
+            return float(calendar.timegm((y, mo, d, 0, 0, 0)))
+    dt = parse_date(s)
+    return None if dt is None else to_timestamp(dt)
+
+
+def _subdirs(root: str) -> list:
     try:
-        return datetime.fromtimestamp(p.stat().st_mtime, tz=timezone.utc)
-    except Exception:
-        return datetime.fromtimestamp(0, tz=timezone.utc)
+        with os.scandir(root) as it:
+            names = sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return [os.path.join(root, n) for n in names]
+
 
+def iter_text_version_dirs(root: pathlib.Path):
+    """
+    Yield every <congress>/bills/<type>/<bill>/text-versions/<version> dir
+    under root, in sorted order.
+
+    Pruned walk: "bills" and "text-versions" are joined on literally, so
+    sibling subtrees (votes/, amendments/, committees/, a bill's actions or
+    unzipped packages) are never listed at all.
+    """
+    for congress in _subdirs(str(root)):
+        for bill_type in _subdirs(os.path.join(congress, "bills")):
+            for bill in _subdirs(bill_type):
+                yield from _subdirs(os.path.join(bill, "text-versions"))
 
-def key_from_path(p: pathlib.Path):
-    parts = list(p.parts)
-    if "bills" in parts:
+
+def _stat_file(p: str):
+    """stat() result for a regular file at p, else None."""
+    try:
+        st = os.stat(p)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+def key_from_path(parts: tuple):
+    """(congress, bill_type, bill_id) from a path's already-split parts (Path.parts is cached)."""
+    try:
         bi = parts.index("bills")
-        if bi >= 1 and len(parts) > bi + 2:
-            congress = parts[bi - 1]
-            bill_type = parts[bi + 1]
-            bill_id = parts[bi + 2]
-            return f"{congress}/{bill_type}/{bill_id}"
+    except ValueError:
+        return None
+    if bi >= 1 and len(parts) > bi + 2:
+        congress = parts[bi - 1]
+        bill_type = parts[bi + 1]
+        bill_id = parts[bi + 2]
+        return (congress, bill_type, bill_id)
     return None
 
 
+def read_candidate(p: pathlib.Path, mtime: float):
+    """Return the (issued, mtime, path) ranking tuple for one text-version data.json."""
+    primary = None
+    try:
+        with p.open("rb") as fh:
+            m = ISSUED_ON_RE.search(fh.read(HEAD_BYTES))
+            if m:
+                candidate_date_str = m.group(1).decode("utf-8")
+            else:
+                # fall back to the full parse for issued/date or a late issued_on
+                fh.seek(0)
+                obj = load_json(fh.read())
+                candidate_date_str = obj.get("issued_on") or obj.get("issued") or obj.get("date")
+        primary = issued_timestamp(candidate_date_str)
+    except Exception:
+        primary = None
+    if primary is None:
+        primary = mtime
+    return (primary, mtime, p)
+
+
+def publish(src, dst):
+    """
+    Place src at dst as a hardlink (one link() syscall, no data copied),
+    falling back to a copy across filesystems or where links are refused.
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EEXIST, errno.EPERM, errno.EMLINK):
+            shutil.copy2(src, dst)
+        else:
+            raise
+
+
+# Replaced output trees are deleted off the main thread; the (path, future)
+# pairs are kept so a failed delete still surfaces (see wait_for_cleanup).
+_DELETER = ThreadPoolExecutor(max_workers=1)
+_pending_deletes = []
+
+
+def set_aside(path: pathlib.Path) -> str:
+    """
+    Move path into a fresh uniquely named dir beside it and return that dir.
+    The unique name means a later run never touches a tree that an earlier
+    run is still deleting.
+    """
+    holder = tempfile.mkdtemp(prefix=path.name + "_old_", dir=str(path.parent))
+    os.rename(path, os.path.join(holder, path.name))
+    return holder
+
+
+def delete_in_background(path: str):
+    _pending_deletes.append((os.path.abspath(path), _DELETER.submit(shutil.rmtree, path)))
+
+
+def wait_for_cleanup():
+    """Wait for background deletes, re-raising the first failure."""
+    while _pending_deletes:
+        _pending_deletes.pop(0)[1].result()
+
+
+def remove_leftovers(out: pathlib.Path):
+    """
+    Delete <out>_tmp_* staging dirs and <out>_old_* replaced trees left beside
+    out by a run that was killed before its own cleanup could run, skipping
+    any this process is still deleting in the background.
+    """
+    busy = {p for p, f in _pending_deletes if not f.done()}
+    for pattern in (out.name + "_tmp_*", out.name + "_old_*"):
+        for p in out.parent.glob(pattern):
+            if p.is_dir() and os.path.abspath(p) not in busy:
+                shutil.rmtree(p, ignore_errors=True)
+
+
 # -------------------------
 # XML helpers
 # -------------------------
-def strip_ns(tag):
-    return tag.split("}", 1)[-1] if "}" in tag else tag
-
-
-def find_date_in_mods(root):
-    # Look for common MODS date fields: dateIssued, dateCreated, date
-    for el in root.iter():
-        tag = strip_ns(el.tag).lower()
-        if tag in ("dateissued", "datecreated", "date"):
-            txt = (el.text or "").strip()
-            if txt:
-                m = re.search(r"\d{4}-\d{2}-\d{2}", txt)
-                if m:
-                    return m.group(0)
-                m = re.search(r"\d{4}", txt)
-                if m:
-                    return m.group(0)
-                return txt
-    # fallback: any 4-digit year or YYYY-MM-DD anywhere in text
-    text_blob = " ".join((el.text or "") for el in root.iter())
-    m = re.search(r"(\d{4}-\d{2}-\d{2}|\d{4})", text_blob)
-    return m.group(1) if m else None
-
-
-def find_identifier_in_mods(root):
-    # prefer type='local' or 'bill', else first non-empty identifier
-    for el in root.iter():
-        if strip_ns(el.tag).lower() == "identifier":
-            attrs = {k.lower(): v for k, v in el.attrib.items()}
-            txt = (el.text or "").strip()
-            if attrs.get("type", "").lower() in ("local", "bill") and txt:
-                return txt
-    # second pass: any canonical-looking identifier
-    human_re = re.compile(
-        r'(?i)^(?:hr|s|hres|sres|hjres|sjres|hconres|sconres)[0-9]+-[0-9]{1,4}-[a-z]{1,10}$'
-    )
-    for el in root.iter():
-        if strip_ns(el.tag).lower() == "identifier":
-            txt = (el.text or "").strip()
-            if txt and human_re.search(txt):
-                return txt
-    # fallback: first non-empty identifier
-    for el in root.iter():
-        if strip_ns(el.tag).lower() == "identifier":
-            txt = (el.text or "").strip()
-            if txt:
-                return txt
-    return None
+DATE_TAGS = ("dateissued", "datecreated", "date")
+MODS_NS = "{http://www.loc.gov/mods/v3}"
+# GovInfo MODS tags scan_mods() acts on, as they appear in iterparse, mapped to
+# the namespace-stripped lowercase names it compares against
+MODS_TAGS = {
+    MODS_NS + t: t.lower()
+    for t in ("dateIssued", "dateCreated", "date", "identifier", "url", "location")
+}
 
 
 def _add_url(urls_map, u):
     if not u:
         return
     u = u.strip()
-    # Guess type by common patterns
-    if re.search(r"\.pdf($|\?)", u, re.I):
+    ul = u.lower()
+    # Guess type by common patterns: ".pdf"/".xml" at the end or before a
+    # query string, "/xml/" or "/html/" segments, any ".htm", or a "/htm" end
+    if ul.endswith(".pdf") or ".pdf?" in ul:
         key = "pdf"
-    elif re.search(r"\.xml($|\?)", u, re.I) or "/xml/" in u.lower():
+    elif ul.endswith(".xml") or ".xml?" in ul or "/xml/" in ul:
         key = "xml"
-    elif re.search(r"\.htm|/html/|/htm($|\?)", u, re.I):
+    elif ".htm" in ul or "/html/" in ul or ul.endswith("/htm") or "/htm?" in ul:
         key = "html"
     else:
         key = "unknown"
@@ -117,39 +253,165 @@ def _add_url(urls_map, u):
     urls_map[key] = u
 
 
-def extract_urls_from_mods(root):
+def scan_mods(source):
+    """
+    Collect (issued, version_id, urls) from a MODS document in one streaming
+    iterparse pass, clearing each element once handled. Returns None if the
+    document can't be parsed.
+
+    issued:     first dateIssued/dateCreated/date text (as YYYY-MM-DD or
+                YYYY when present), else the first date/year in any text.
+    version_id: first identifier with type 'local'/'bill', else the first
+                canonical-looking one (hr85-118-ih), else the first non-empty.
+    urls:       <url> elements classified by _add_url; urls nested in a
+                <location> are added again for the location, as the old tree
+                walk did. Falls back to any http(s) text if none.
+
+    The old walks visited elements in document order (pre-order), but
+    iterparse finishes them in post-order, so each element is numbered at
+    its start event. A "first" result is replaced by a later-finishing
+    element only if that one started earlier (an ancestor), and url
+    additions are replayed by number, since _add_url's keys depend on order.
+    """
+    issued = issued_fallback = None
+    issued_at = fallback_at = None
+    id_typed = id_human = id_any = None
+    typed_at = human_at = any_at = None
     urls = {}
-    # look for <location><url> and <url> in MODS; also any element named 'url'
-    for el in root.iter():
-        tag = strip_ns(el.tag).lower()
-        if tag == "location":
-            # look for nested <url> elements
-            for child in el.iter():
-                if strip_ns(child.tag).lower() == "url":
-                    u = (child.text or "").strip()
-                    if u:
-                        _add_url(urls, u)
-        elif tag == "url":
-            u = (el.text or "").strip()
-            if u:
-                _add_url(urls, u)
-    # Also search for obvious link-like text in related elements (fallback)
+    url_log = []
+    url_adds = []
+    loc_starts = []
+    http_texts = []
+    starts = []
+    n = 0
+    try:
+        for event, el in ET.iterparse(source, events=("start", "end")):
+            # exact MODS tags skip the strip+lower; anything else strips
+            # "{namespace}" inline: find() is -1 without one, so the slice is
+            # the whole tag and no list is allocated either way
+            tag = MODS_TAGS.get(el.tag)
+            if tag is None:
+                tag = el.tag
+                tag = tag[tag.find("}") + 1:].lower()
+            if event == "start":
+                starts.append(n)
+                n += 1
+                if tag == "location":
+                    loc_starts.append(len(url_log))
+                continue
+
+            at = starts.pop()
+            raw = el.text or ""
+            txt = raw.strip()
+            if txt and tag in DATE_TAGS and (issued_at is None or at < issued_at):
+                m = ISO_DATE_RE.search(txt) or YEAR_RE.search(txt)
+                issued = m.group(0) if m else txt
+                issued_at = at
+            if issued is None and (fallback_at is None or at < fallback_at):
+                m = DATE_OR_YEAR_RE.search(raw)
+                if m:
+                    issued_fallback = m.group(1)
+                    fallback_at = at
+
+            if tag == "identifier" and txt:
+                if typed_at is None or at < typed_at:
+                    attrs = {k.lower(): v for k, v in el.attrib.items()}
+                    if attrs.get("type", "").lower() in ("local", "bill"):
+                        id_typed, typed_at = txt, at
+                if (human_at is None or at < human_at) and HUMAN_ID_RE.search(txt):
+                    id_human, human_at = txt, at
+                if any_at is None or at < any_at:
+                    id_any, any_at = txt, at
+            elif tag == "url" and txt:
+                url_log.append((at, txt))
+                url_adds.append((at, [txt]))
+            elif tag == "location" and loc_starts:
+                nested = sorted(url_log[loc_starts.pop():])
+                url_adds.append((at, [u for _, u in nested]))
+
+            if txt and not url_log and HTTP_RE.search(txt):
+                http_texts.append((at, txt))
+            el.clear()
+    except Exception:
+        return None
+
+    url_adds.sort(key=operator.itemgetter(0))
+    for _, us in url_adds:
+        for u in us:
+            _add_url(urls, u)
     if not urls:
-        for el in root.iter():
-            txt = (el.text or "").strip()
-            if txt and re.search(r"https?://", txt):
-                _add_url(urls, txt)
-    return urls
+        http_texts.sort()
+        for _, txt in http_texts:
+            _add_url(urls, txt)
+    return issued or issued_fallback, id_typed or id_human or id_any, urls
 
 
-def parse_mods_file(path: pathlib.Path):
+def scan_mods_in_zip(path: str):
+    """
+    scan_mods() over the mods.xml member of a GovInfo package.zip, parsed
+    straight from the archive's decompression stream (no extraction, no
+    in-memory copy of the XML). Returns None if there is no usable member.
+    """
     try:
-        root = ET.parse(str(path)).getroot()
-        return root
+        with zipfile.ZipFile(path) as z:
+            # infolist() is the already-parsed central directory; namelist()
+            # would build a second list of every member name first
+            for info in z.infolist():
+                if info.filename.lower().endswith("mods.xml"):
+                    with z.open(info) as mf:
+                        return scan_mods(mf)
+            return None
     except Exception:
+        # corrupt archive, encrypted member, unsupported compression...:
+        # fail soft like scan_mods, so the caller falls back to the mtime
         return None
 
 
+def find_mods(tv: str):
+    """
+    scan_mods() result for the first parseable mods.xml under a text-version
+    dir, tried in the old lookup order: tv/mods.xml, then every
+    tv/*/mods.xml (e.g. tv/BILLS-*/mods.xml), then deeper ones depth-first.
+    Else the result for the first package.zip containing one; None if neither.
+
+    The direct and one-level files are checked by path, so the usual layout
+    never lists the unzipped package contents; only when neither parses does
+    one os.walk per subdir look for deeper mods.xml and any package.zip.
+    """
+    direct = os.path.join(tv, "mods.xml")
+    if os.path.isfile(direct):
+        mods = scan_mods(direct)
+        if mods is not None:
+            return mods
+    subdirs = _subdirs(tv)
+    for d in subdirs:
+        cand = os.path.join(d, "mods.xml")
+        if os.path.isfile(cand):
+            mods = scan_mods(cand)
+            if mods is not None:
+                return mods
+
+    zips = []
+    if os.path.isfile(os.path.join(tv, "package.zip")):
+        zips.append(os.path.join(tv, "package.zip"))
+    for d in subdirs:
+        for dirpath, dirnames, filenames in os.walk(d):
+            dirnames.sort()
+            # d/mods.xml was already tried above
+            if dirpath != d and "mods.xml" in filenames:
+                mods = scan_mods(os.path.join(dirpath, "mods.xml"))
+                if mods is not None:
+                    return mods
+            if "package.zip" in filenames:
+                zips.append(os.path.join(dirpath, "package.zip"))
+    # package.zip that the workflow's unzip step skipped or failed on
+    for z in zips:
+        mods = scan_mods_in_zip(z)
+        if mods is not None:
+            return mods
+    return None
+
+
 # -------------------------
 # New: synthesize bill_id from path (always used)
 # -------------------------
@@ -175,7 +437,7 @@ def synthesize_bill_id_from_path(tv_path: pathlib.Path) -> str:
         raise ValueError(f"Failed to parse path for bill_id: {tv_path}: {e}")
 
     # Prefer pattern like 'hr1237' (alpha prefix + digits)
-    m = re.match(r'^([a-z]+)(\d+)', bill_dir)
+    m = BILL_DIR_RE.match(bill_dir)
     if m:
         bt = m.group(1)
         num = str(int(m.group(2)))  # strip leading zeros
@@ -183,7 +445,7 @@ def synthesize_bill_id_from_path(tv_path: pathlib.Path) -> str:
         return f"{bt}{num}-{cong}".lower()
 
     # Otherwise, take first run of digits anywhere in bill_dir
-    m2 = re.search(r'(\d+)', bill_dir)
+    m2 = DIGITS_RE.search(bill_dir)
     if m2:
         num = str(int(m2.group(1)))
         bt = bill_type or 'hr'
@@ -192,7 +454,7 @@ def synthesize_bill_id_from_path(tv_path: pathlib.Path) -> str:
 
     # Fallback: scan a few following path components for digits
     for extra in parts[bi + 2:bi + 6]:
-        m3 = re.search(r'(\d+)', extra)
+        m3 = DIGITS_RE.search(extra)
         if m3:
             num = str(int(m3.group(1)))
             bt = bill_type or 'hr'
@@ -206,155 +468,177 @@ def synthesize_bill_id_from_path(tv_path: pathlib.Path) -> str:
 # -------------------------
 # Ensure data.json exists in text-version folders
 # -------------------------
-def ensure_data_jsons():
-    created = 0
-    for tv in sorted(base.glob("*/bills/*/*/text-versions/*")):
-        if not tv.is_dir():
-            continue
-        target = tv / "data.json"
-        if target.exists():
-            continue
+def ensure_data_json(tv: pathlib.Path) -> bool:
+    """Write tv/data.json from the version's MODS metadata; True if written."""
+    target = tv / "data.json"
+    mods = find_mods(str(tv))
 
-        mods_root = None
-        # direct mods.xml
-        direct = tv / "mods.xml"
-        if direct.exists():
-            mods_root = parse_mods_file(direct)
-        # subdirectories (e.g., BILLS-*)
-        if mods_root is None:
-            for p in tv.iterdir():
-                if p.is_dir():
-                    cand = p / "mods.xml"
-                    if cand.exists():
-                        mods_root = parse_mods_file(cand)
-                        if mods_root is not None:
-                            break
-        # recursive search for any mods.xml under tv (workflow already unzipped)
-        if mods_root is None:
-            for cand in tv.rglob("mods.xml"):
-                mods_root = parse_mods_file(cand)
-                if mods_root is not None:
-                    break
-
-        issued = None
-        version_id = None
-        urls_map = {}
-
-        if mods_root is not None:
-            issued = find_date_in_mods(mods_root)
-            version_id = find_identifier_in_mods(mods_root)
-            urls_map = extract_urls_from_mods(mods_root)
-
-        if not issued:
-            try:
-                issued = datetime.fromtimestamp(tv.stat().st_mtime, tz=timezone.utc).date().isoformat()
-            except Exception:
-                issued = None
-
-        # synthesize bill_id from path (always prefer path-based deterministic id)
-        try:
-            bill_id = synthesize_bill_id_from_path(tv)
-        except Exception as e:
-            bill_id = None
-            print(f"WARNING: {e}")
-
-        data = {}
-        if issued:
-            data["issued_on"] = str(issued)
-        data["version_code"] = tv.name
-        if version_id:
-            data["bill_version_id"] = version_id
-        if bill_id:
-            data["bill_id"] = bill_id
-            data["bill_id_source"] = "path"
-        if urls_map:
-            data["urls"] = urls_map
+    issued = None
+    version_id = None
+    urls_map = {}
+
+    if mods is not None:
+        issued, version_id, urls_map = mods
 
+    if not issued:
         try:
-            target.parent.mkdir(parents=True, exist_ok=True)
-            with target.open("w", encoding="utf-8") as fh:
-                json.dump(data, fh, indent=2, ensure_ascii=False)
-            created += 1
-            print(f"WROTE {target} -> {data}")
-        except Exception as e:
-            print(f"FAILED writing {target}: {e}")
+            issued = datetime.fromtimestamp(tv.stat().st_mtime, tz=timezone.utc).date().isoformat()
+        except Exception:
+            issued = None
+
+    # synthesize bill_id from path (always prefer path-based deterministic id)
+    try:
+        bill_id = synthesize_bill_id_from_path(tv)
+    except Exception as e:
+        bill_id = None
+        print(f"WARNING: {e}")
+
+    data = {}
+    if issued:
+        data["issued_on"] = str(issued)
+    data["version_code"] = tv.name
+    if version_id:
+        data["bill_version_id"] = version_id
+    if bill_id:
+        data["bill_id"] = bill_id
+        data["bill_id_source"] = "path"
+    if urls_map:
+        data["urls"] = urls_map
 
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with target.open("wb") as fh:
+            fh.write(dump_json(data))
+        print(f"WROTE {target} -> {data}")
+        return True
+    except Exception as e:
+        print(f"FAILED writing {target}: {e}")
+        return False
+
+
+def _process_tv(tv: str) -> bool:
+    # top-level so ProcessPoolExecutor can pickle it
+    return ensure_data_json(pathlib.Path(tv))
+
+
+def gather_text_versions(root: pathlib.Path) -> list:
+    """
+    Return [(path, mtime)] for every text-version data.json under root, in
+    sorted order, generating any missing data.json from MODS on the way.
+
+    One walk serves both jobs: the single stat() per data.json detects a
+    missing file and otherwise supplies the mtime used for ranking. Missing
+    ones are generated in a process pool, since MODS parsing holds the GIL.
+    """
+    paths = [os.path.join(tv, "data.json") for tv in iter_text_version_dirs(root)]
+    stats = [_stat_file(p) for p in paths]
+    missing = [os.path.dirname(p) for p, st in zip(paths, stats) if st is None]
+
+    created = 0
+    if missing:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            created = sum(ex.map(_process_tv, missing, chunksize=32))
+        stats = [st if st is not None else _stat_file(p) for p, st in zip(paths, stats)]
     print(f"Done: created {created} data.json files (when missing)")
 
+    return [(pathlib.Path(p), st.st_mtime) for p, st in zip(paths, stats) if st is not None]
 
-# Run generator
-ensure_data_jsons()
-
-# gather text-version files
-text_files = sorted(p for p in base.rglob("*/bills/*/*/text-versions/*/data.json") if p.is_file())
-print(f"DEBUG: found {len(text_files)} text-version data.json files")
-if text_files:
-    print("DEBUG sample:", [str(p) for p in text_files[:10]])
-
-# group by bill key
-groups = {}
-skipped = 0
-for p in text_files:
-    k = key_from_path(p)
-    if not k:
-        print("Skipping unrecognized path:", p)
-        skipped += 1
-        continue
-    groups.setdefault(k, []).append(p)
-print(f"DEBUG: grouped into {len(groups)} unique bills (skipped {skipped})")
-
-# pick best per group
-picked = 0
-tmpdir = pathlib.Path(tempfile.mkdtemp(prefix="latest_billtext_tmp_"))
-try:
-    for key in sorted(groups.keys()):
-        best = None
-        for p in groups[key]:
-            dt_primary = None
-            try:
-                with p.open("r", encoding="utf-8") as fh:
-                    obj = json.load(fh)
-                candidate_date_str = obj.get("issued_on") or obj.get("issued") or obj.get("date")
-                dt_primary = parse_date(candidate_date_str)
-            except Exception:
-                dt_primary = None
-            if dt_primary is None:
-                dt_primary = mtime_dt(p)
-            tie = mtime_dt(p)
-            cand = (dt_primary, tie, p)
-            if best is None or (cand[0] > best[0]) or (cand[0] == best[0] and cand[1] > best[1]):
-                best = cand
-        if best:
-            _, _, best_path = best
-            congress, bill_type, bill_id = key.split("/", 2)
-            dest = tmpdir / congress / "bills" / bill_type / bill_id
-            dest.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(best_path, dest / "data.json")
-            picked += 1
-            print(f"picked {best_path} -> {dest/'data.json'}")
-        else:
-            print(f"no valid candidate for {key}")
-
-    print(f"done: picked {picked} bills (skipped {skipped})")
-    if picked == 0:
-        print("ERROR: picked 0 bills — not updating latest_billtext. Exiting with code 2.", flush=True)
-        sys.exit(2)
-
-    # atomic swap
-    if out.exists():
-        backup = out.with_name(out.name + ".backup")
-        if backup.exists():
-            shutil.rmtree(backup)
-        shutil.move(str(out), str(backup))
-    shutil.move(str(tmpdir), str(out))
-    print(f"latest_billtext updated: {picked} files written under {out}/")
-    if "backup" in locals() and backup.exists():
-        shutil.rmtree(backup)
-except Exception as e:
+
+def main(base=pathlib.Path("data"), out=pathlib.Path("latest_billtext")):
+    """
+    Rebuild out/ with the latest text version of every bill under base/.
+    Importable so an orchestrator can call it repeatedly in one warm
+    interpreter, reusing the compiled patterns and date cache.
+    """
+    remove_leftovers(out)
+
+    # gather text-version files, generating missing data.json as we go
+    text_files = gather_text_versions(base)
+    print(f"DEBUG: found {len(text_files)} text-version data.json files")
+    if text_files:
+        print("DEBUG sample:", [str(p) for p, _ in text_files[:10]])
+
+    # group by bill key
+    groups = {}
+    skipped = 0
+    for p, mtime in text_files:
+        k = key_from_path(p.parts)
+        if not k:
+            print("Skipping unrecognized path:", p)
+            skipped += 1
+            continue
+        groups.setdefault(k, []).append((p, mtime))
+    print(f"DEBUG: grouped into {len(groups)} unique bills (skipped {skipped})")
+
+    # rank candidates concurrently, then pick best per group. Most bills have a
+    # single text version, which wins outright, so only contested groups are read.
+    # ranked maps each contested key to its (issued, mtime, path) ranking tuples.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        pending = {
+            k: [ex.submit(read_candidate, p, mtime) for p, mtime in plist]
+            for k, plist in groups.items()
+            if len(plist) > 1
+        }
+        ranked = {k: [f.result() for f in futures] for k, futures in pending.items()}
+
+    picked = 0
+    # Stage next to out (same filesystem as data/) rather than in the system temp
+    # dir, so publish() can hardlink instead of falling back to copies (EXDEV).
+    tmpdir = pathlib.Path(tempfile.mkdtemp(prefix=out.name + "_tmp_", dir=str(out.parent)))
+    # plain strings in the per-bill loop: each Path "/" builds a new Path object
+    tmpdir_s = str(tmpdir)
     try:
-        if tmpdir.exists():
+        copies = []
+        for key in sorted(groups):
+            candidates = ranked.get(key)
+            if candidates is None:
+                best_path = groups[key][0][0]
+            else:
+                # max() keeps the first of equal (issued, mtime) candidates
+                _, _, best_path = max(candidates, key=operator.itemgetter(0, 1))
+            congress, bill_type, bill_id = key
+            dst = os.path.join(tmpdir_s, congress, "bills", bill_type, bill_id, "data.json")
+            copies.append((str(best_path), dst))
+            picked += 1
+            print(f"picked {best_path} -> {dst}")
+
+        # create each shared <congress>/bills/<type> dir once, then only the
+        # per-bill leaf, instead of a parents=True mkdir chain per bill
+        leaves = [os.path.dirname(dst) for _, dst in copies]
+        for d in sorted({os.path.dirname(leaf) for leaf in leaves}):
+            os.makedirs(d, exist_ok=True)
+        for leaf in leaves:
+            os.mkdir(leaf)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            # list() so the first failed publish raises here
+            list(ex.map(lambda c: publish(*c), copies))
+
+        print(f"done: picked {picked} bills (skipped {skipped})")
+        if picked == 0:
+            print("ERROR: picked 0 bills — not updating latest_billtext. Exiting with code 2.", flush=True)
             shutil.rmtree(tmpdir)
-    except Exception:
-        pass
-    print("ERROR during processing:", e, flush=True)
-    raise
+            sys.exit(2)
+
+        # atomic swap: tmpdir shares out's parent, so both moves are plain
+        # renames with no per-file work; the old tree is deleted in the
+        # background so a warm caller of main() isn't blocked on it
+        old = set_aside(out) if out.exists() else None
+        os.rename(tmpdir, out)
+        print(f"latest_billtext updated: {picked} files written under {out}/")
+        if old is not None:
+            delete_in_background(old)
+    except Exception as e:
+        try:
+            if tmpdir.exists():
+                shutil.rmtree(tmpdir)
+        except Exception:
+            pass
+        print("ERROR during processing:", e, flush=True)
+        raise
+
+
+if __name__ == "__main__":
+    main()
+    # a failed delete of the replaced tree still exits non-zero
+    wait_for_cleanup()